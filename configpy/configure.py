@@ -1,10 +1,10 @@
 """Contains the Configuration Data structures which can be used to write more readable config."""
 
 # python imports
-from typing import Any, Callable, Optional
-from collections import OrderedDict
+from typing import Any, Callable, Iterable, Optional, Tuple
+from collections import deque
 from typing_extensions import Self
-from copy import deepcopy
+import functools
 import inspect
 from importlib import import_module
 import sys
@@ -12,23 +12,33 @@ import sys
 # third-party imports
 
 # internal imports
-from configpy.utils import (load_json, write_json,
+from configpy.utils import (load_json, write_json, write_json_many,
                             Path, is_jsonable, is_sequence)
 
 
-class Parameters(OrderedDict):
+_SEQ_TYPES = (list, tuple)
+
+
+def _object_path(value: Any) -> str:
+    """
+    Returns the dotted path of the given class/method, or of its class for other objects.
+    """
+    if not hasattr(value, '__qualname__'):
+        value = value.__class__
+    module = getattr(value, '__module__', None) or inspect.getmodule(value).__name__
+    return f"{module}.{value.__qualname__}"
+
+
+class Parameters(dict):
     """
     An ordered dict of parameters.
     """
 
     def __str__(self) -> str:
-        k = 'key'
-        v = 'argument'
-        head = (f"{k:^18}|{v:^18}")+"\n"
+        row = "{:^18}|{:^18}\n".format
+        head = row('key', 'argument')
         div = (f"-"*37)+"\n"
-        lines = ''
-        for k, v in self.items():
-            lines += (f"{k:^18}|{v:^18}")+"\n"
+        lines = ''.join([row(k, v) for k, v in self.items()])
         return head+div+lines
 
 
@@ -78,42 +88,45 @@ class Configure(dict):
     ``` 
     """
 
-    internal_keys = ['self_build']
+    internal_keys = frozenset(('self_build',))
 
     def __init__(self, **kwargs) -> None:
         super().__init__(**kwargs)
 
-    def __self_build__(self) -> None:
-        if self.get('self_build', None):
-            self.pop('self_build')
-            for key, value in self.items():
-                if isinstance(value, Configure):
+    def __self_build__(self) -> dict:
+        """
+        Returns the arguments of the configure object, with the nested configure objects built if self_build is set.
+        """
+        # local names for the loop below, avoids global lookups per item.
+        _isinstance, _Configure, _is_sequence = isinstance, Configure, is_sequence
+        _internal_keys = self.internal_keys
+        build = self.get('self_build', None)
+        arguments = {}
+        for key, value in self.items():
+            if key == 'obj' or key in _internal_keys:
+                continue
+            if build:
+                if _isinstance(value, _Configure):
                     if 'obj' in value:
-                        self[key] = value()
-                if is_sequence(value):
-                    elem_type = type(value)
-                    self[key] = elem_type(
-                        [i() if isinstance(i, Configure) else i for i in value])
+                        value = value()
+                elif _is_sequence(value):
+                    value = type(value)(
+                        [i() if _isinstance(i, _Configure) else i for i in value])
+            arguments[key] = value
+        return arguments
 
     def __setattr__(self, __name: str, __value: Any) -> None:
         self[__name] = __value
 
-    def __getattribute__(self, __name: str) -> Any:
-        return super().__getattribute__(__name)
-
     def __call__(self, *args: Any, **kwds: Any) -> Any:
 
-        obj = self.pop('obj', None)
+        obj = self.get('obj', None)
         if obj:
-            self.__self_build__()
-            just_args = self.pop('__args__', None)
-            if just_args:
-                just_args = [i for i in just_args]
-                args = [i for i in args]
-                args.extend(just_args)
-            arguments = dict(**self)
+            # the configure object itself is left untouched, so it can be called again.
+            arguments = self.__self_build__()
+            just_args = arguments.pop('__args__', None) or ()
             arguments.update(kwds)
-            return obj(*args, **arguments)
+            return obj(*args, *just_args, **arguments)
         else:
             raise AttributeError(
                 f"No Class or Method is available. For e.g. pass obj='Your method/class' as an argument")
@@ -123,19 +136,29 @@ class Configure(dict):
         Flattens the nested configure object and retruns as ordered dict.
         """
 
+        _isinstance, _hasattr, _Configure = isinstance, hasattr, Configure
+        _internal_keys = self.internal_keys
         outp = Parameters()
-        for key, value in self.items():
-            key_ = key
-            if prev_key:
-                key = f"{prev_key}_{key}"
-            if isinstance(value, Configure):
-                outp.update(value.flatten(key))
-            else:
-                if key_ not in self.internal_keys:
-                    if hasattr(value, '__name__'):
+        # stack of (prefix, items iterator) frames, walked depth first so the
+        # output keeps the same order as the nested configure objects.
+        stack = deque([(prev_key, iter(self.items()))])
+        _push = stack.append
+        while stack:
+            prev, items = stack[-1]
+            for key, value in items:
+                key_ = key
+                if prev:
+                    key = f"{prev}_{key}"
+                if _isinstance(value, _Configure):
+                    _push((key, iter(value.items())))
+                    break
+                if key_ not in _internal_keys:
+                    if _hasattr(value, '__name__'):
                         outp[key] = value.__name__
                     else:
                         outp[key] = value
+            else:
+                stack.pop()
         return outp
 
     def serialize(self) -> None:
@@ -143,20 +166,28 @@ class Configure(dict):
         Serializes the configure object to create JSON serializable configure object.
         """
 
-        for key, value in self.items():
-            if isinstance(value, Configure):
-                value.serialize()
-            if is_sequence(value):
-                for v in value:
-                    if isinstance(v, Configure):
-                        v.serialize()
-            if key == 'obj' or not is_jsonable(value):
-                new_obj = inspect.getmodule(value).__name__
-                if hasattr(value, '__qualname__'):
-                    name = value.__qualname__
-                else:
-                    name = value.__class__.__qualname__
-                self[key] = f"{new_obj}.{name}"
+        # collect the nested configure objects first and serialize them in
+        # reverse, so every child is already serialized before its parent.
+        # a sub-config shared under several keys is serialized only once.
+        nodes = []
+        seen = set()
+        stack = deque([self])
+        while stack:
+            node = stack.pop()
+            if id(node) in seen:
+                continue
+            seen.add(id(node))
+            nodes.append(node)
+            for value in node.values():
+                if isinstance(value, Configure):
+                    stack.append(value)
+                if is_sequence(value):
+                    stack.extend(v for v in value if isinstance(v, Configure))
+
+        for node in reversed(nodes):
+            for key, value in node.items():
+                if key == 'obj' or not is_jsonable(value):
+                    node[key] = _object_path(value)
 
     def to_json(self, path: Path) -> None:
         """
@@ -167,15 +198,50 @@ class Configure(dict):
         path: Path where the JSON file has to be stored including it's name.
 
         """
-        clone = self.clone()
-        clone.serialize()
-        write_json(path=path, data=clone)
+        write_json(path=path, data=self, default=_object_path)
+
+    @staticmethod
+    def to_json_many(items: Iterable[Tuple[Path, "Configure"]]) -> None:
+        """
+        Dumps several configure objects to JSON files.
+        All the configs are encoded before any of the files is written.
+
+        Parameters:
+        -----------
+        items: pairs of path where the JSON file has to be stored and the configure object to store.
+
+        """
+        write_json_many(items=items, default=_object_path)
 
     def clone(self) -> Self:
         """
         returns a copy with new address on the memory.
+        The nested configure objects and dicts (also inside lists/tuples) are copied, other values are shared.
         """
-        return deepcopy(self)
+
+        memo = {}
+        stack = deque()
+
+        def copy(node):
+            if type(node) is not dict and not isinstance(node, Configure):
+                return node
+            new = memo.get(id(node))
+            if new is None:
+                new = memo[id(node)] = type(node).__new__(type(node))
+                stack.append((node, new))
+            return new
+
+        outp = copy(self)
+        while stack:
+            node, new = stack.pop()
+            for key, value in node.items():
+                elem_type = type(value)
+                if elem_type in _SEQ_TYPES:
+                    value = elem_type([copy(i) for i in value])
+                else:
+                    value = copy(value)
+                new[key] = value
+        return outp
 
     def __repr__(self) -> str:
         dict_str = super().__repr__()
@@ -188,22 +254,31 @@ class Configure(dict):
     @staticmethod
     def traverse_dict(data: dict) -> None:
 
-        for key, value in data.items():
-            if key == 'obj':
-                data[key] = Configure.get_method(value)
-            if is_sequence(value):
-                value = [v for v in value] # making mutable
-                data[key] = value
-                for v in value:
-                    if isinstance(v, dict):
-                        v_idx = value.index(v)
-                        if 'obj' in v:
-                            value[v_idx] = Configure(**v)
-                        Configure.traverse_dict(value[v_idx])
-            if isinstance(value, dict):
-                if 'obj' in value:
-                    data[key] = Configure(**value)
-                Configure.traverse_dict(data[key])
+        # the nested dicts with an 'obj' are collected first, so every distinct
+        # method is resolved once however often it is used in the config.
+        objs = []
+        stack = deque([data])
+        while stack:
+            node = stack.pop()
+            if 'obj' in node:
+                objs.append(node)
+            for key, value in node.items():
+                if is_sequence(value):
+                    value = [v for v in value] # making mutable
+                    node[key] = value
+                    for v_idx, v in enumerate(value):
+                        if isinstance(v, dict):
+                            if 'obj' in v:
+                                value[v_idx] = Configure(**v)
+                            stack.append(value[v_idx])
+                if isinstance(value, dict):
+                    if 'obj' in value:
+                        node[key] = Configure(**value)
+                    stack.append(node[key])
+
+        methods = {obj: Configure.get_method(obj) for obj in {node['obj'] for node in objs}}
+        for node in objs:
+            node['obj'] = methods[node['obj']]
 
     @staticmethod
     def from_json(path: Path) -> Self:
@@ -227,6 +302,18 @@ class Configure(dict):
         Given the string form of the method, this method return object of that method.
         """
 
+        # not cached, the methods in __main__ can be redefined e.g. in a notebook.
+        if obj.startswith("__main__."):
+            return getattr(sys.modules["__main__"], obj.split('.')[-1])
+        return Configure._import_method(obj)
+
+    @staticmethod
+    @functools.lru_cache(maxsize=1024)
+    def _import_method(obj: str) -> Callable:
+        """
+        Imports the method from its string form. The results are cached, so repeated methods are imported only once.
+        """
+
         if "." in obj:
             module_names = obj.split('.')
             method_name = module_names[-1]
@@ -234,18 +321,15 @@ class Configure(dict):
             module_names = ['builtins', obj]
             method_name = obj
 
-        if module_names[0] == "__main__":
-            module = sys.modules["__main__"]
-        else:
-            module = import_module(module_names[0])
+        module = import_module(module_names[0])
 
-            for sub_module_name in module_names[1:-1]:
-                try:
-                    module = getattr(module, sub_module_name)
-                #torch deletes the intermediate attributes. e.g. torch.optim.adamw.AdamW is torch.optim.AdamW
-                #https://github.com/pytorch/pytorch/blob/956059fa2e4a7faf77480c562a103ce717f14b7f/torch/optim/__init__.py#L29
-                except AttributeError:
-                    print(f"WARNING: {module.__name__} doesn't have {sub_module_name}. Skipping it and trying to import next method/module")
+        for sub_module_name in module_names[1:-1]:
+            try:
+                module = getattr(module, sub_module_name)
+            #torch deletes the intermediate attributes. e.g. torch.optim.adamw.AdamW is torch.optim.AdamW
+            #https://github.com/pytorch/pytorch/blob/956059fa2e4a7faf77480c562a103ce717f14b7f/torch/optim/__init__.py#L29
+            except AttributeError:
+                print(f"WARNING: {module.__name__} doesn't have {sub_module_name}. Skipping it and trying to import next method/module")
 
         method = getattr(module, method_name)
         return method
@@ -262,8 +346,7 @@ class Configure(dict):
         """
 
         if isinstance(obj, Configure):
-            obj = obj.clone()
-            obj =  obj(*args, **kwargs)
+            obj = obj(*args, **kwargs)
         return obj
 
 class ConfigBuild(Configure):
@@ -274,5 +357,7 @@ class ConfigBuild(Configure):
     """
 
     def __init__(self, **kwargs) -> None:
-        self['self_build'] = True
-        super().__init__(**kwargs)
+        if not kwargs.pop('self_build', True):
+            raise ValueError(
+                "ConfigBuild always builds the nested objects, use Configure for self_build=False")
+        super().__init__(self_build=True, **kwargs)
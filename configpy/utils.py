@@ -1,8 +1,21 @@
 """Some utility functions."""
 
 # python imports
-from typing import NewType, Any, Sequence
+from typing import NewType, Any, Callable, Iterable, Optional, Sequence, Tuple
+from enum import Enum
 import json
+import math
+from uuid import UUID
+
+# third-party imports
+try:
+    import orjson
+except ImportError:
+    orjson = None
+else:
+    # non str keys are written as strings and datetimes/dataclasses go through default, like json does.
+    _ORJSON_OPTIONS = (orjson.OPT_INDENT_2 | orjson.OPT_NON_STR_KEYS
+                       | orjson.OPT_PASSTHROUGH_DATETIME | orjson.OPT_PASSTHROUGH_DATACLASS)
 
 
 Path = NewType('Path', str)
@@ -23,11 +36,73 @@ def is_sequence(x: Any) -> bool:
     """
     Checks whether given object is Sequence and not string.
     """
+    # list/tuple are checked first, the Sequence ABC check is much slower.
+    elem_type = type(x)
+    if elem_type is list or elem_type is tuple:
+        return True
     if isinstance(x, Sequence) and not isinstance(x, str):
         return True
     return False
 
 
+def _orjson_compatible(data: Any) -> bool:
+    """
+    Checks whether orjson writes the given data like json does.
+    orjson writes NaN/Infinity as null where json keeps them, and writes enums and UUIDs
+    itself where json passes them to default.
+    """
+    seen = set()
+    stack = [data]
+    while stack:
+        value = stack.pop()
+        if isinstance(value, (dict, list, tuple)):
+            if id(value) in seen:
+                continue
+            seen.add(id(value))
+            stack.extend(value.values() if isinstance(value, dict) else value)
+        elif isinstance(value, (Enum, UUID)):
+            return False
+        elif isinstance(value, float) and not math.isfinite(value):
+            return False
+    return True
+
+
+def dumps(data: Any, default: Optional[Callable[[Any], Any]] = None) -> bytes:
+    """encodes data to indented json bytes, using orjson when it is installed.
+
+    Parameters:
+    -----------
+    data: data to be encoded.
+    default: function called for objects which can't be serialized otherwise.
+
+    """
+    if orjson is not None:
+        try:
+            blob = orjson.dumps(data, default=default, option=_ORJSON_OPTIONS)
+        except orjson.JSONEncodeError:  # e.g. integers beyond 64-bit, json handles them.
+            pass
+        else:
+            if _orjson_compatible(data):
+                return blob
+    return json.dumps(data, indent=4, default=default).encode('utf-8')
+
+
+def loads(data: bytes) -> Any:
+    """decodes json bytes, using orjson when it is installed.
+
+    Parameters:
+    -----------
+    data: json document to be decoded.
+
+    """
+    if orjson is not None:
+        try:
+            return orjson.loads(data)
+        except orjson.JSONDecodeError:  # e.g. NaN written by json, json reads it.
+            pass
+    return json.loads(data)
+
+
 def load_json(path: "Path") -> Any:
     """loads a json file.
 
@@ -36,21 +111,40 @@ def load_json(path: "Path") -> Any:
     path: file path of json to be loaded.
 
     """
-    with open(path, 'r+') as f:
-        data = json.load(f)
+    with open(path, 'rb') as f:
+        data = loads(f.read())
     return data
 
 
-def write_json(path: Path, data: Any) -> None:
+def write_json(path: Path, data: Any, default: Optional[Callable[[Any], Any]] = None) -> None:
     """writes data to a json file.
 
     Parameters:
     -----------
     path: file path of json to be saved.
     data: data to be dumped to json file.
+    default: function called for objects which can't be serialized otherwise.
+
+    """
+    write_json_many([(path, data)], default=default)
+
+
+def write_json_many(items: Iterable[Tuple[Path, Any]],
+                    default: Optional[Callable[[Any], Any]] = None) -> None:
+    """writes data to several json files. All the data is encoded before any file is written.
+
+    Parameters:
+    -----------
+    items: pairs of file path of json to be saved and data to be dumped to it.
+    default: function called for objects which can't be serialized otherwise.
 
     """
-    assert path.endswith(
-        '.json'), f"invalid path {path}, path should end with '.json'"
-    with open(path, 'w+') as f:
-        json.dump(data, f, indent=4)
+    items = list(items)
+    for path, _ in items:
+        assert path.endswith(
+            '.json'), f"invalid path {path}, path should end with '.json'"
+    # encode up front so each file sees a single write instead of one per token.
+    blobs = [dumps(data, default=default) for _, data in items]
+    for (path, _), blob in zip(items, blobs):
+        with open(path, 'wb') as f:
+            f.write(blob)
@@ -45,5 +45,6 @@ setup(
     # dependency_links=dependency_links,
     author_email='rahul.jakkamsetty@icloud.com',
     extras_require={
+        'orjson': ['orjson'],
    },
 )
\ No newline at end of file
@@ -1,5 +1,16 @@
+import collections
+import dataclasses
+import datetime
+import enum
+import json
+import os
+import sys
+import tempfile
 import unittest
-from configpy.configure import ConfigBuild
+import uuid
+from unittest import mock
+from configpy.configure import Configure, ConfigBuild
+from configpy.utils import dumps, orjson
 
 
 def multiply(a, b):
@@ -11,6 +22,14 @@ def add(a,b):
 def subtract(a, b):
     return a - b
 
+@dataclasses.dataclass
+class Point:
+    x: int
+    y: int
+
+class Color(enum.Enum):
+    RED = 1
+
 myconfig = ConfigBuild(obj = add,
                         a = 10, 
                         b = ConfigBuild(obj = subtract,
@@ -20,12 +39,122 @@ myconfig = ConfigBuild(obj = add,
 
 json_config = ConfigBuild.from_json('./config.json')
 
+nested_config = ConfigBuild(obj = add,
+                            a = 10,
+                            b = ConfigBuild(obj = multiply, a = 4, b = 2))
+
 class TestConfig(unittest.TestCase):
     def test_bodmas(self):
         """Test the operations on give numbers"""
         self.assertEqual(myconfig(), 10+(10-4*2))
     def test_json(self):
         self.assertDictEqual(json_config(), {'a': 10, 'b': 2})
+    def test_flatten(self):
+        self.assertEqual(list(nested_config.flatten().items()),
+                         [('obj', 'add'), ('a', 10), ('b_obj', 'multiply'),
+                          ('b_a', 4), ('b_b', 2)])
+    def test_serialize_shared(self):
+        inner = Configure(obj = multiply, a = 4, b = 2)
+        config = Configure(obj = add, a = inner, b = inner)
+        config.serialize()
+        self.assertEqual(config['a']['obj'], f"{multiply.__module__}.multiply")
+        self.assertIs(config['a'], config['b'])
+    def test_to_json(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, 'config.json')
+            nested_config.to_json(path)
+            loaded = Configure.from_json(path)
+        self.assertIs(nested_config['obj'], add)
+        self.assertEqual(loaded, nested_config)
+    @unittest.skipIf(orjson is None, "orjson is not installed")
+    def test_to_json_orjson(self):
+        for value in ({1: 0.5}, 2**70, float('nan'), datetime.date(2024, 1, 1),
+                      Point(1, 2), Color.RED, uuid.UUID(int=1), None):
+            config = Configure(obj = dict, value = value)
+            with tempfile.TemporaryDirectory() as tmp:
+                path = os.path.join(tmp, 'config.json')
+                config.to_json(path)
+                with open(path) as f:
+                    with_orjson = json.loads(f.read())
+                with mock.patch('configpy.utils.orjson', None):
+                    config.to_json(path)
+                with open(path) as f:
+                    without_orjson = json.loads(f.read())
+            self.assertEqual(json.dumps(with_orjson), json.dumps(without_orjson))
+    @unittest.skipIf(orjson is None, "orjson is not installed")
+    def test_dumps_null_orjson(self):
+        self.assertEqual(dumps({'a': None, 'b': '/dev/null'}),
+                         orjson.dumps({'a': None, 'b': '/dev/null'}, option=orjson.OPT_INDENT_2))
+    def test_to_json_many(self):
+        configs = [ConfigBuild(obj = multiply, a = a, b = 2) for a in range(3)]
+        with tempfile.TemporaryDirectory() as tmp:
+            paths = [os.path.join(tmp, f'config_{i}.json') for i in range(3)]
+            Configure.to_json_many(zip(paths, configs))
+            loaded = [Configure.from_json(path) for path in paths]
+        self.assertEqual(loaded, configs)
+    def test_clone(self):
+        inner = Configure(obj = multiply, a = 4, b = 2)
+        config = Configure(obj = add,
+                           a = inner,
+                           b = [inner],
+                           groups = {'inner': inner})
+        clone = config.clone()
+        self.assertEqual(clone, config)
+        self.assertIsNot(clone['a'], inner)
+        self.assertIs(clone['a'], clone['b'][0])
+        self.assertIs(clone['a'], clone['groups']['inner'])
+        self.assertIs(clone['obj'], add)
+        clone['groups']['inner']['a'] = 99
+        self.assertEqual(inner['a'], 4)
+    def test_from_json_resolves_once(self):
+        data = {'obj': 'dict',
+                'layers': [{'obj': 'collections.OrderedDict', 'a': 1},
+                           {'obj': 'collections.OrderedDict', 'a': 1}],
+                'head': {'obj': 'collections.OrderedDict', 'a': 1},
+                'opt': {'obj': 'dict'}}
+        Configure._import_method.cache_clear()
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, 'config.json')
+            with open(path, 'w') as f:
+                json.dump(data, f)
+            config = Configure.from_json(path)
+        self.assertIs(config['obj'], dict)
+        self.assertIs(config['opt']['obj'], dict)
+        self.assertIs(config['head']['obj'], collections.OrderedDict)
+        for layer in config['layers']:
+            self.assertIsInstance(layer, Configure)
+            self.assertIs(layer['obj'], collections.OrderedDict)
+        cache_info = Configure._import_method.cache_info()
+        self.assertEqual((cache_info.hits, cache_info.misses), (0, 2))
+    def test_get_method_main_redefined(self):
+        main = sys.modules['__main__']
+        class Model:
+            pass
+        main._configpy_test_model = Model
+        first = Configure.get_method('__main__._configpy_test_model')
+        class Model:
+            pass
+        main._configpy_test_model = Model
+        try:
+            self.assertIsNot(Configure.get_method('__main__._configpy_test_model'), first)
+            self.assertIs(Configure.get_method('__main__._configpy_test_model'), Model)
+        finally:
+            del main._configpy_test_model
+    def test_build_from(self):
+        self.assertEqual(Configure.build_from(nested_config), 18)
+        self.assertEqual(Configure.build_from(nested_config), 18)
+        self.assertIs(nested_config['b']['obj'], multiply)
+    def test_call_twice(self):
+        self.assertEqual(nested_config(), 18)
+        self.assertEqual(nested_config(a = 1), 9)
+        self.assertIs(nested_config['b']['obj'], multiply)
+    def test_call_self_build_false(self):
+        config = Configure(obj = dict, self_build = False, a = 1)
+        self.assertDictEqual(config(), {'a': 1})
+    def test_config_build_self_build(self):
+        self.assertEqual(ConfigBuild(obj = add, self_build = True, a = 1, b = 2)(), 3)
+        with self.assertRaises(ValueError):
+            ConfigBuild(obj = add, self_build = False, a = 1, b = 2)
 
 
 if __name__ == "__main__":